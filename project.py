@@ -1,8 +1,22 @@
-import csv
-from typing import Dict, List, Set, Tuple, Optional
+import heapq
+import re
+from array import array
+from collections import OrderedDict, deque
+from typing import Dict, Iterator, List, Set, Tuple, Optional
 from dataclasses import dataclass
 
-@dataclass
+STOP_COST = 1  # 同一线路上相邻两站之间的代价
+TRANSFER_COST = 3  # 换乘一次的代价
+ROUTE_CACHE_SIZE = 1024  # 路线查询缓存的最大条目数
+
+# 将输入中的全角标点统一转换为半角,只需构建一次
+_NORMALIZE = str.maketrans({'，': ',', '－': '-'})
+# 按逗号和'-'将输入切分为起点线路、起点站名、终点线路、终点站名
+_SPLIT = re.compile(r'[,-]')
+
+Route = Tuple[Tuple['Station', bool], ...]  # 一条换乘路径
+
+@dataclass(slots=True)
 class Station:
     """
     表示地铁系统中的一个站点
@@ -11,33 +25,51 @@ class Station:
         id: 站点的唯一标识符
         line: 站点所属的线路名称
         name: 站点名称
-        transfer_ids: 可换乘的其他站点ID列表
+        transfer_ids: 可换乘的其他站点ID元组
         prev: 同一线路上的前一个站点(可选)
         next: 同一线路上的后一个站点(可选)
+        line_pos: 站点在所属线路中的位置下标
     """
     id: int
     line: str 
     name: str
-    transfer_ids: List[int] # 换乘站点的ID
+    transfer_ids: Tuple[int, ...] # 换乘站点的ID,加载后不再修改
     prev: Optional['Station'] = None  # 前一站点,默认为None
     next: Optional['Station'] = None  # 后一站点,默认为None
+    line_pos: int = -1  # 线路中的位置下标,加载完成前为-1
 
 class SubwaySystem:
     """
-    一个地铁换乘系统，它可以从一个 CSV 文件中加载站点信息，并提供一个方法来查找从一个站点到另一个站点的所有换乘路径。
+    一个地铁换乘系统，它可以从一个 CSV 文件中加载站点信息，并提供一个方法来查找从一个站点到另一个站点的换乘路径。
     
     属性:
         stations: 存储所有站点的字典,key为站点ID,value为Station对象
         lines: 存储所有线路的字典,key为线路名称,value为该线路上所有站点的列表
+        name_index: 站点索引,key为(线路名称, 站点名称),value为Station对象
+        adj: 站点邻接表,key为站点ID,value为(相邻站点ID, 是否换乘)的列表
+        line_adj: 线路邻接表,key为线路名称,value为可以直接换乘到的其他线路名称集合
+        _line_stations: 每条线路上按顺序排列的站点元组,与Station.line_pos配合按下标访问
+        _reverse_adj: 反向站点邻接表,key为站点ID,value为(可直接到达该站点的站点ID, 是否换乘)的列表
+        _reverse_line_adj: 反向线路邻接表,key为线路名称,value为可以直接换乘到该线路的其他线路名称集合
+        _transfers_to_cache: 按目标线路缓存的各线路到该线路的最少换乘次数,由 _transfers_to 按需计算
+        _route_cache: 路线查询结果的LRU缓存,key为查询参数,value为查询结果
     """
     
     def __init__(self):
         """
         初始化地铁换乘系统。
-        创建两个空字典用于存储站点和线路信息。
+        创建空字典用于存储站点、线路信息、站点索引、站点和线路的邻接表以及路线查询缓存。
         """
         self.stations: Dict[int, Station] = {}  # 存储所有站点
         self.lines: Dict[str, List[Station]] = {}  # 存储所有线路
+        self.name_index: Dict[Tuple[str, str], Station] = {}  # 按线路和站名索引站点
+        self.adj: Dict[int, List[Tuple[int, bool]]] = {}  # 站点邻接表
+        self.line_adj: Dict[str, Set[str]] = {}  # 线路邻接表
+        self._line_stations: Dict[str, Tuple[Station, ...]] = {}  # 按顺序存储各线路的站点
+        self._reverse_adj: Dict[int, List[Tuple[int, bool]]] = {}  # 反向站点邻接表
+        self._reverse_line_adj: Dict[str, Set[str]] = {}  # 反向线路邻接表
+        self._transfers_to_cache: Dict[str, Dict[str, int]] = {}  # 各线路到目标线路的最少换乘次数
+        self._route_cache: 'OrderedDict[Tuple[str, str, str, str, int, int], Tuple[Route, ...]]' = OrderedDict()
         
     def load_from_csv(self, filename: str):
         """
@@ -46,150 +78,491 @@ class SubwaySystem:
         处理步骤:
         1. 打开并读取CSV文件
         2. 跳过表头行
-        3. 解析每一行数据:
+        3. 按逗号切分并解析每一行数据(数据文件不含引号转义,无需使用csv模块):
            - 转换站点ID为整数
            - 获取线路名称
            - 获取站点名称
            - 处理换乘站点ID(如果存在)
-        4. 创建Station对象并存储
-        5. 建立同一线路站点之间的前后关系
+        4. 创建Station对象并存储,同时建立(线路名称, 站点名称)索引
+        5. 建立同一线路站点之间的前后关系,记录站点在线路中的位置
+        6. 构建站点邻接表及反向邻接表
+        7. 构建线路邻接表及反向线路邻接表
+        
+        线路之间的最少换乘次数不在加载时计算,而是在查询时按目标线路计算并缓存。
+        加载后站点数据发生变化,之前缓存的路线查询结果和线路换乘次数会被清空。
         
         :param filename: CSV 文件的路径
         """
+        self._route_cache.clear()
+        self._transfers_to_cache.clear()
+        # 循环内频繁使用的属性提前绑定为局部变量,减少查找开销
+        stations = self.stations
+        lines = self.lines
+        name_index = self.name_index
+        
         with open(filename, encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader) # 跳过表头
+            next(f) # 跳过表头
             
             # 逐行处理CSV数据
-            for row in reader:
-                station_id = int(row[0])
-                line = row[1]
-                name = row[2]
-                # 处理换乘站点ID,如果存在则分割并转换为整数列表
-                transfer_ids = [int(id) for id in row[3].split('/')] if row[3] else []
+            for row in f:
+                station_id, line, name, transfers = row.rstrip('\r\n').split(',', 3)
+                station_id = int(station_id)
+                # 处理换乘站点ID,如果存在则分割并转换为整数元组
+                transfer_ids = tuple(map(int, transfers.split('/'))) if transfers else ()
                 
                 # 创建新的Station对象
                 station = Station(station_id, line, name, transfer_ids)
-                self.stations[station_id] = station
+                stations[station_id] = station
+                name_index[(line, name)] = station
                 
                 # 将站点添加到对应的线路列表中
-                if line not in self.lines:
-                    self.lines[line] = []
-                self.lines[line].append(station)
+                lines.setdefault(line, []).append(station)
         
-        # 设置站点的前后关系
-        for line_stations in self.lines.values():
-            for i in range(len(line_stations)):
+        # 按线路设置站点的位置和前后关系,同时在同一次遍历中构建邻接表、反向邻接表和线路邻接表
+        adj = self.adj
+        # 反向邻接表用于从终点出发反向搜索
+        reverse_adj = self._reverse_adj = {station_id: [] for station_id in stations}
+        reverse_line_adj = self._reverse_line_adj = {line: set() for line in lines}
+        for line, line_stations in lines.items():
+            line_tuple = tuple(line_stations)
+            self._line_stations[line] = line_tuple
+            # 两条线路之间只要有一个换乘站即相邻
+            connected_lines = self.line_adj.setdefault(line, set())
+            last = len(line_tuple) - 1
+            for i, station in enumerate(line_tuple):
+                station.line_pos = i
+                station_id = station.id
+                neighbors: List[Tuple[int, bool]] = []
                 # 设置前一站点(除第一个站点外)
                 if i > 0:
-                    line_stations[i].prev = line_stations[i-1]
+                    prev_station = line_tuple[i - 1]
+                    station.prev = prev_station
+                    neighbors.append((prev_station.id, False))
+                    reverse_adj[prev_station.id].append((station_id, False))
                 # 设置后一站点(除最后一个站点外)
-                if i < len(line_stations) - 1:
-                    line_stations[i].next = line_stations[i+1]
+                if i < last:
+                    next_station = line_tuple[i + 1]
+                    station.next = next_station
+                    neighbors.append((next_station.id, False))
+                    reverse_adj[next_station.id].append((station_id, False))
+                # 可换乘的站点
+                for transfer_id in station.transfer_ids:
+                    neighbors.append((transfer_id, True))
+                    reverse_adj[transfer_id].append((station_id, True))
+                    other_line = stations[transfer_id].line
+                    if other_line != line:
+                        connected_lines.add(other_line)
+                        reverse_line_adj[other_line].add(line)
+                adj[station_id] = neighbors
     
-    def find_route(self, start_line: str, start_station: str, end_line: str, end_station: str) -> List[List[Tuple[Station, bool]]]:
+    def find_route(self, start_line: str, start_station: str, end_line: str, end_station: str,
+                   max_paths: int = 3, max_transfers: int = 6) -> Iterator[Route]:
         """
-        查找从一个站点到另一个站点的所有换乘路径。
+        查找从一个站点到另一个站点的换乘路径,每找到一条路径就立即生成,调用方可以边查找边输出。
+        
+        起点和终点在同一线路上时,直接生成沿该线路行驶的唯一路线;
+        否则使用Yen算法求出换乘不超过 max_transfers 次、代价最小的前 max_paths 条无环路径,
+        同线路相邻站点的代价为 STOP_COST,换乘的代价为 TRANSFER_COST,
+        路径按代价从小到大生成,代价相同时换乘次数少的在前。
+        完整遍历过的查询结果会被缓存,最多保留最近使用的 ROUTE_CACHE_SIZE 条;需要列表时可用 list() 包装。
         
         :param start_line: 起点站的线路
         :param start_station: 起点站的名称
         :param end_line: 终点站的线路
         :param end_station: 终点站的名称
-        :return: 一个列表，其中每个元素是一个换乘路径，换乘路径是一个列表，其中每个元素是一个元组，包含当前站点和是否需要换乘
+        :param max_paths: 最多返回的路径数量,小于1时不返回任何路径
+        :param max_transfers: 每条路径允许的最多换乘次数
+        :return: 换乘路径的迭代器，每个换乘路径是一个元组，其中每个元素是一个元组，包含当前站点和是否需要换乘
+        """
+        key = (start_line, start_station, end_line, end_station, max_paths, max_transfers)
+        routes = self._route_cache.get(key)
+        if routes is not None:
+            self._route_cache.move_to_end(key)
+            yield from routes
+            return
+        
+        found: List[Route] = []
+        for route in self._search_routes(start_line, start_station, end_line, end_station, max_paths, max_transfers):
+            found.append(route)
+            yield route
+        
+        # 只有完整遍历后才缓存,提前停止迭代的查询下次会重新查找
+        self._route_cache[key] = tuple(found)
+        if len(self._route_cache) > ROUTE_CACHE_SIZE:
+            # 淘汰最久未使用的查询结果
+            self._route_cache.popitem(last=False)
+    
+    def _search_routes(self, start_line: str, start_station: str, end_line: str, end_station: str,
+                       max_paths: int, max_transfers: int) -> Iterator[Route]:
+        """
+        使用Yen算法逐条生成换乘路径,不经过缓存。参数与生成的路径同 find_route。
         """
         # 找到起点和终点站
-        start = next((s for s in self.lines[start_line] if s.name == start_station), None)
-        end = next((s for s in self.lines[end_line] if s.name == end_station), None)
+        start = self.name_index.get((start_line, start_station))
+        end = self.name_index.get((end_line, end_station))
         
-        if not start or not end:
-            return []
-            
-        # 用于存储已访问的站点，避免重复访问形成环路
-        visited: Set[int] = set()
-        # 用于存储当前正在探索的路径
-        current_path: List[Tuple[Station, bool]] = []
-        # 用于存储所有找到的有效路径
-        all_paths: List[List[Tuple[Station, bool]]] = []
-        # 用于存储路径的唯一标识，防止重复路径
-        path_signatures: Set[str] = set()
-        
-        def get_path_signature(path: List[Tuple[Station, bool]]) -> str:
-            """
-            获取当前路径的字符串表示，用于路径去重。
-            连续出现两次相同站点ID是允许的（表示换乘），
-            但连续出现三次或更多次相同站点ID时只保留两次。
-            
-            :param path: 当前路径
-            :return: 路径的字符串表示，由站点ID组成
-            """
-            processed_ids: List[int] = []
-            for station, _ in path:
-                # 如果processed_ids长度小于2，或者当前站点与前两个站点不同，
-                # 或者只与前一个站点相同，则添加
-                if (len(processed_ids) < 2 or 
-                    station.id != processed_ids[-1] or 
-                    station.id != processed_ids[-2]):
-                    processed_ids.append(station.id)
-            return ','.join(str(id) for id in processed_ids)
-        
-        def dfs(current: Station, target: Station, is_transfer: bool = False):
-            """
-            使用深度优先搜索来查找换乘路径。
-            
-            :param current: 当前站点
-            :param target: 目标站点
-            :param is_transfer: 是否是换乘到当前站点
-            """
-            if current.id in visited:
-                return
+        if not start or not end or max_paths < 1:
+            return
+        
+        # 同一线路上无需换乘,直接截取线路上两站之间的站点
+        if start.line == end.line:
+            line_tuple = self._line_stations[start.line]
+            i, j = start.line_pos, end.line_pos
+            if i <= j:
+                segment = line_tuple[i:j + 1]
+            else:
+                segment = line_tuple[j:i + 1][::-1]
+            yield tuple((station, False) for station in segment)
+            return
+        
+        # 各站点到终点的无约束最短路径只需计算一次,供所有偏离点复用
+        suffix_tree = self._suffix_tree(end.id)
+        shortest = self._shortest_path(start.id, end.id, set(), set(), suffix_tree, max_transfers)
+        if shortest is None:
+            return
+        
+        # 路径确定后立即转换为Station对象并生成
+        stations = self.stations
+        yield tuple((stations[sid], bool(is_transfer)) for sid, is_transfer in zip(shortest[2], shortest[3]))
+        
+        # 已确定的路径(按代价从小到大),元素为(代价, 换乘次数, 站点ID数组, 换乘标记数组)
+        found_paths: List[Tuple[int, int, array, bytearray]] = [shortest]
+        # 候选路径的小顶堆,元素同上,代价相同时换乘次数少的优先
+        candidates: List[Tuple[int, int, array, bytearray]] = []
+        # 已加入过的路径(站点ID数组的字节表示),防止重复路径
+        seen: Set[bytes] = {shortest[2].tobytes()}
+        
+        while len(found_paths) < max_paths:
+            _, _, last_ids, last_transfers = found_paths[-1]
+            # 还需要 needed 条路径;候选路径已有这么多条时,总代价超过其中第 needed 小的路径不可能被选中,
+            # 用该代价限制偏离路径的搜索范围
+            needed = max_paths - len(found_paths)
+            cost_bound = heapq.nsmallest(needed, candidates)[-1][0] if len(candidates) >= needed else None
+            # 与当前根路径前缀相同的已确定路径,随着根路径变长逐步筛选
+            matching = [ids for _, _, ids, _ in found_paths]
+            # 根路径上偏离点之前的站点,以及根路径的代价和换乘次数,随i递增而增量更新
+            banned_nodes: Set[int] = set()
+            root_cost = 0
+            root_transfers = 0
+            for i in range(len(last_ids) - 1):
+                # 以第i个站点为偏离点,前i+1个站点为根路径
+                spur_id = last_ids[i]
+                if i > 0:
+                    banned_nodes.add(last_ids[i - 1])
+                    if last_transfers[i]:
+                        root_cost += TRANSFER_COST
+                        root_transfers += 1
+                    else:
+                        root_cost += STOP_COST
+                matching = [ids for ids in matching if len(ids) > i + 1 and ids[i] == spur_id]
+                
+                # 禁止与已确定路径共用根路径后的下一条边,这些边都从偏离点出发,只需记录下一站点
+                banned_next = {ids[i + 1] for ids in matching}
+                # 根路径换乘到偏离点时,记录换乘前的站点,偏离路径不能从偏离点再换乘到该站点可直接换乘的站点
+                source_via = last_ids[i - 1] if i > 0 and last_transfers[i] else -1
+                
+                spur = self._shortest_path(spur_id, end.id, banned_nodes, banned_next, suffix_tree,
+                                           max_transfers - root_transfers, source_via,
+                                           None if cost_bound is None else cost_bound - root_cost)
+                if spur is None:
+                    continue
+                spur_cost, spur_transfer_count, spur_ids, spur_transfers = spur
                 
-            visited.add(current.id)
-            current_path.append((current, is_transfer))
+                # 拼接根路径与偏离路径,偏离路径的第一个站点即偏离点本身
+                total_ids = last_ids[:i] + spur_ids
+                signature = total_ids.tobytes()
+                if signature not in seen:
+                    seen.add(signature)
+                    total_transfers = last_transfers[:i + 1] + spur_transfers[1:]
+                    heapq.heappush(candidates, (root_cost + spur_cost, root_transfers + spur_transfer_count,
+                                                total_ids, total_transfers))
             
-            if current.id == target.id:
-                path_sig = get_path_signature(current_path)
-                if path_sig not in path_signatures:
-                    path_signatures.add(path_sig)
-                    all_paths.append(current_path[:])
+            if not candidates:
+                break
+            path = heapq.heappop(candidates)
+            found_paths.append(path)
+            yield tuple((stations[sid], bool(is_transfer)) for sid, is_transfer in zip(path[2], path[3]))
+    
+    def _transfers_to(self, target_line: str) -> Dict[str, int]:
+        """
+        沿反向线路邻接表从目标线路出发做广度优先搜索,得到各线路到目标线路的最少换乘次数。
+        结果按目标线路缓存,同一目标线路只计算一次。
+        
+        :param target_line: 目标线路名称
+        :return: 字典,key为能到达目标线路的线路名称,value为至少需要换乘的次数
+        """
+        transfers_to = self._transfers_to_cache.get(target_line)
+        if transfers_to is not None:
+            return transfers_to
+        
+        transfers_to = {target_line: 0}
+        queue = deque([target_line])
+        while queue:
+            current_line = queue.popleft()
+            for other_line in self._reverse_line_adj[current_line]:
+                if other_line not in transfers_to:
+                    transfers_to[other_line] = transfers_to[current_line] + 1
+                    queue.append(other_line)
+        self._transfers_to_cache[target_line] = transfers_to
+        return transfers_to
+    
+    def _suffix_tree(self, target: int) -> Dict[int, Tuple[int, int, int, bool]]:
+        """
+        沿反向邻接表从终点出发做Dijkstra搜索,得到每个站点到终点的无约束最短路径。
+        路径按(代价, 换乘次数)比较,代价相同时换乘次数少的更优。
+        
+        :param target: 终点站ID
+        :return: 字典,key为能到达终点的站点ID,value为(到终点的代价, 到终点的换乘次数, 下一站点ID, 是否换乘到下一站点),终点的下一站点ID为-1
+        """
+        suffix_tree: Dict[int, Tuple[int, int, int, bool]] = {target: (0, 0, -1, False)}
+        heap: List[Tuple[int, int, int]] = [(0, 0, target)]
+        reverse_adj = self._reverse_adj
+        
+        while heap:
+            cost, transfers, current = heapq.heappop(heap)
+            if (cost, transfers) > suffix_tree[current][:2]:
+                continue
+            for neighbor, is_transfer in reverse_adj[current]:
+                if is_transfer:
+                    new_cost, new_transfers = cost + TRANSFER_COST, transfers + 1
+                else:
+                    new_cost, new_transfers = cost + STOP_COST, transfers
+                if neighbor not in suffix_tree or (new_cost, new_transfers) < suffix_tree[neighbor][:2]:
+                    suffix_tree[neighbor] = (new_cost, new_transfers, current, is_transfer)
+                    heapq.heappush(heap, (new_cost, new_transfers, neighbor))
+        return suffix_tree
+    
+    def _shortest_path(self, source: int, target: int, banned_nodes: Set[int], banned_next: Set[int],
+                       suffix_tree: Dict[int, Tuple[int, int, int, bool]],
+                       max_transfers: int, source_via: int = -1,
+                       max_cost: Optional[int] = None) -> Optional[Tuple[int, int, array, bytearray]]:
+        """
+        查找两个站点之间换乘次数不超过 max_transfers 且代价最小的路径,代价相同时取换乘次数最少的路径。
+        
+        如果 suffix_tree 中记录的无约束最短路径没有经过被禁止的站点和边,且换乘次数不超限,
+        它就是约束下的最优路径,直接复用;否则使用A*算法在(站点, 已换乘次数)上搜索。
+        启发函数为当前线路到终点线路的最少换乘次数乘以 TRANSFER_COST,
+        它不会高估剩余代价,因此找到的路径与Dijkstra算法一样是最优的;
+        堆按(估计总代价, 已知代价, 已换乘次数)排序,代价相同的终点状态中换乘次数最少的最先出队;
+        与终点线路不连通或至少还需换乘的次数超限的站点直接剪枝。
+        
+        不会生成多余的连续换乘,即从站点u换乘到v后又换乘到u本身就可以直接换乘的站点:
+        这样的换乘可以用u直接换乘代替,最优路径中只可能出现在起点附近。搜索时只限制起点换乘后的下一次换乘,
+        得到的路径仍有多余的连续换乘时,才跳过起点的换乘边搜索,再对起点换乘到的每个站点递归搜索。
+        
+        :param source: 起点站ID
+        :param target: 终点站ID
+        :param banned_nodes: 不允许经过的站点ID
+        :param banned_next: 不允许从起点直接到达的相邻站点ID
+        :param suffix_tree: 各站点到终点的无约束最短路径,由 _suffix_tree 计算
+        :param max_transfers: 允许的最多换乘次数
+        :param source_via: 换乘到起点之前所在的站点ID,不是换乘到达起点时为-1
+        :param max_cost: 路径代价的上限,为None时不限制;超过上限的路径可能返回None
+        :return: (路径代价, 换乘次数, 站点ID数组, 换乘标记数组),换乘标记表示是否换乘到对应站点;不存在路径时返回None
+        """
+        if source not in suffix_tree:
+            return None
+        
+        stations = self.stations
+        # 换乘到起点后,不能再从起点换乘到换乘前站点可直接换乘的站点
+        via_transfers = stations[source_via].transfer_ids if source_via != -1 else ()
+        
+        # 尝试复用无约束最短路径
+        cost, transfer_count, next_id, is_transfer = suffix_tree[source]
+        if (next_id not in banned_next and transfer_count <= max_transfers
+                and not (is_transfer and next_id in via_transfers)):
+            path_ids = array('i', [source])
+            path_transfers = bytearray([False])
+            while next_id != -1 and next_id not in banned_nodes:
+                path_ids.append(next_id)
+                path_transfers.append(is_transfer)
+                _, _, next_id, is_transfer = suffix_tree[next_id]
+            if next_id == -1:
+                return cost, transfer_count, path_ids, path_transfers
+        
+        # 先在允许多余连续换乘的宽松模型上搜索,宽松模型包含所有合法路径,得到的路径合法时即为最优
+        best = self._search(source, target, banned_nodes, banned_next, max_transfers, via_transfers,
+                            False, max_cost)
+        if best is None:
+            return None
+        _, _, path_ids, path_transfers = best
+        if len(set(path_ids)) == len(path_ids) and not self._has_redundant_transfer(path_ids, path_transfers):
+            return best
+        
+        # 宽松模型的路径不合法时精确求解:跳过起点的换乘边搜索一次,
+        # 再对起点换乘到的每个站点递归搜索,并用已找到的最优代价限制递归搜索的范围
+        best = self._search(source, target, banned_nodes, banned_next, max_transfers, via_transfers,
+                            True, max_cost)
+        if max_transfers > 0:
+            blocked = banned_nodes | banned_next
+            for neighbor in stations[source].transfer_ids:
+                if neighbor in blocked or neighbor in via_transfers:
+                    continue
+                limit = best[0] if best is not None else max_cost
+                spur = self._shortest_path(neighbor, target, banned_nodes | {source}, set(), suffix_tree,
+                                           max_transfers - 1, source,
+                                           None if limit is None else limit - TRANSFER_COST)
+                if spur is None:
+                    continue
+                spur_cost, spur_transfer_count, spur_ids, spur_transfers = spur
+                spur_cost += TRANSFER_COST
+                spur_transfer_count += 1
+                if best is None or (spur_cost, spur_transfer_count) < best[:2]:
+                    path_ids = array('i', [source])
+                    path_ids.extend(spur_ids)
+                    path_transfers = bytearray([False, True])
+                    path_transfers.extend(spur_transfers[1:])
+                    best = spur_cost, spur_transfer_count, path_ids, path_transfers
+        return best
+    
+    def _search(self, source: int, target: int, banned_nodes: Set[int], banned_next: Set[int],
+                max_transfers: int, via_transfers: Tuple[int, ...], skip_source_transfers: bool,
+                max_cost: Optional[int]) -> Optional[Tuple[int, int, array, bytearray]]:
+        """
+        使用A*算法在(站点, 已换乘次数)上搜索换乘次数不超过 max_transfers 且代价最小的路径。
+        
+        起点换乘到的部分站点作为单独的出发分支,从起点换乘到这些站点后不能再换乘到起点可直接换乘的站点;
+        其余位置的多余连续换乘不做限制,由调用方检查。
+        
+        :param source: 起点站ID
+        :param target: 终点站ID
+        :param banned_nodes: 不允许经过的站点ID
+        :param banned_next: 不允许从起点直接到达的相邻站点ID
+        :param max_transfers: 允许的最多换乘次数
+        :param via_transfers: 不允许从起点直接换乘到达的站点ID
+        :param skip_source_transfers: 为True时不从起点换乘
+        :param max_cost: 路径代价的上限,为None时不限制
+        :return: 同 _shortest_path;不存在代价不超过 max_cost 的路径时返回None
+        """
+        stations = self.stations
+        # 各线路到终点线路的最少换乘次数
+        line_dist = self._transfers_to(stations[target].line)
+        source_line = stations[source].line
+        if line_dist.get(source_line, max_transfers + 1) > max_transfers:
+            return None
+        
+        source_transfers = stations[source].transfer_ids
+        source_blocked = banned_nodes | banned_next
+        if skip_source_transfers:
+            source_blocked = source_blocked | set(source_transfers)
+        # 起点不能直接换乘到达的站点
+        unreachable = {transfer_id for transfer_id in source_transfers
+                       if transfer_id in source_blocked or transfer_id in via_transfers}
+        # 起点换乘到的站点如果可以换乘到上述站点,不是从起点换乘到达时就可能需要经它换乘,
+        # 因此作为单独的出发分支:分支状态的状态键为 ~(站点ID * 分支数 + 分支序号),其余状态的状态键为站点ID;
+        # 分支内的路径不能再回到分支站点,分支站点自身不能再换乘到起点可直接换乘的站点。
+        # 其余换乘站点不做限制,得到的多余连续换乘由调用方检查
+        branches = tuple(transfer_id for transfer_id in source_transfers
+                         if transfer_id not in unreachable
+                         and not unreachable.isdisjoint(stations[transfer_id].transfer_ids))
+        branch_count = len(branches)
+        branch_of = {transfer_id: k for k, transfer_id in enumerate(branches)}
+        branch_blocked = [banned_nodes | {transfer_id} for transfer_id in branches]
+        # 每个(状态键, 已换乘次数)状态的已知代价,以及到达该状态的(前一状态键, 前一状态的换乘次数, 是否换乘)
+        dist: Dict[Tuple[int, int], int] = {(source, 0): 0}
+        parent: Dict[Tuple[int, int], Tuple[int, int, bool]] = {}
+        # 已出队状态键的最少换乘次数:同一状态键后出队的状态代价不会更小,换乘次数也不更少时无需再扩展;
+        # 不属于分支的状态限制更少,也可以代替同一站点各分支的状态
+        settled: Dict[int, int] = {}
+        # 堆中元素为(估计总代价, 已知代价, 已换乘次数, 状态键)
+        heap: List[Tuple[int, int, int, int]] = [(line_dist[source_line] * TRANSFER_COST, 0, 0, source)]
+        # 循环内频繁使用的属性和函数提前绑定为局部变量,减少查找开销
+        adj = self.adj
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        no_limit = max_transfers + 1
+        # 没有上限时取一个不可能达到的代价
+        cost_limit = max_cost if max_cost is not None else len(stations) * TRANSFER_COST
+        found: Optional[Tuple[int, int]] = None
+        
+        while heap:
+            estimate, cost, transfers, key = heappop(heap)
+            if estimate > cost_limit:
+                break
+            if key >= 0:
+                current = key
+                branch = -1
             else:
-                # 如果当前已经在目标线路上，只考虑同线路移动
-                if current.line == target.line:
-                    for next_station in [current.prev, current.next]:
-                        if next_station and next_station.id not in visited:
-                            dfs(next_station, target, False)
+                current, branch = divmod(~key, branch_count)
+            if current == target:
+                found = (key, transfers)
+                break
+            if transfers >= settled.get(key, no_limit):
+                continue
+            if branch >= 0 and transfers >= settled.get(current, no_limit):
+                continue
+            settled[key] = transfers
+            # 当前站点的启发值;只有换乘才会改变线路,同线路移动沿用该值
+            current_h = estimate - cost
+            # 起点和分支站点有额外禁止的边,每个状态出队时判断一次
+            if current == source:
+                blocked = source_blocked
+                redundant = via_transfers
+            elif branch >= 0:
+                blocked = branch_blocked[branch]
+                redundant = source_transfers if current == branches[branch] else ()
+            else:
+                blocked = banned_nodes
+                redundant = ()
+            for neighbor, is_transfer in adj[current]:
+                if neighbor in blocked:
+                    continue
+                if is_transfer:
+                    if neighbor in redundant:
+                        continue
+                    new_transfers = transfers + 1
+                    transfers_left = line_dist.get(stations[neighbor].line, no_limit)
+                    if new_transfers + transfers_left > max_transfers:
+                        continue
+                    new_cost = cost + TRANSFER_COST
+                    neighbor_h = transfers_left * TRANSFER_COST
+                    new_branch = branch_of.get(neighbor, -1) if current == source else branch
                 else:
-                    # 不在目标线路上时，优先考虑换乘到目标线路
-                    target_line_transfers = []
-                    other_transfers = []
-                    
-                    for transfer_id in current.transfer_ids:
-                        transfer_station = self.stations[transfer_id]
-                        if transfer_station.id not in visited:
-                            if transfer_station.line == target.line:
-                                target_line_transfers.append(transfer_station)
-                            else:
-                                other_transfers.append(transfer_station)
-                    
-                    # 优先探索通向目标线路的换乘站
-                    if target_line_transfers:
-                        for transfer_station in target_line_transfers:
-                            dfs(transfer_station, target, True)
-                    else:
-                        # 如果没有通向目标线路的换乘站，则考虑其他选项
-                        for transfer_station in other_transfers:
-                            dfs(transfer_station, target, True)
-                        
-                        # 同一线路移动
-                        for next_station in [current.prev, current.next]:
-                            if next_station and next_station.id not in visited:
-                                dfs(next_station, target, False)
-            
-            current_path.pop()
-            visited.remove(current.id)
+                    new_transfers = transfers
+                    new_cost = cost + STOP_COST
+                    neighbor_h = current_h
+                    new_branch = branch
+                if new_transfers >= settled.get(neighbor, no_limit):
+                    continue
+                new_key = neighbor if new_branch < 0 else ~(neighbor * branch_count + new_branch)
+                state = (new_key, new_transfers)
+                if new_cost < dist.get(state, new_cost + 1):
+                    dist[state] = new_cost
+                    parent[state] = (key, transfers, is_transfer)
+                    heappush(heap, (new_cost + neighbor_h, new_cost, new_transfers, new_key))
+        
+        if found is None:
+            return None
         
-        # 开始搜索路径
-        dfs(start, end)
-        return all_paths
+        # 沿着前驱回溯出完整路径
+        key, transfers = found
+        path_ids = array('i')
+        path_transfers = bytearray()
+        while key != source or transfers != 0:
+            prev_key, prev_transfers, is_transfer = parent[(key, transfers)]
+            path_ids.append(key if key >= 0 else ~key // branch_count)
+            path_transfers.append(is_transfer)
+            key, transfers = prev_key, prev_transfers
+        path_ids.append(source)
+        path_transfers.append(False)
+        path_ids.reverse()
+        path_transfers.reverse()
+        return dist[found], found[1], path_ids, path_transfers
+    
+    def _has_redundant_transfer(self, ids: array, transfers: bytearray) -> bool:
+        """
+        判断路径中是否有多余的连续换乘:从站点u换乘到v后又换乘到w,而u本身就可以直接换乘到w。
+        
+        :param ids: 路径的站点ID数组
+        :param transfers: 路径的换乘标记数组
+        :return: 存在多余的连续换乘时返回True
+        """
+        stations = self.stations
+        for k in range(2, len(ids)):
+            if transfers[k] and transfers[k - 1] and ids[k] in stations[ids[k - 2]].transfer_ids:
+                return True
+        return False
+
 
 def main():
     subway = SubwaySystem()
@@ -203,56 +576,47 @@ def main():
     while True:
         try:
             print("\n请输入线路信息：")
-            route_info = input().strip()
+            route_info = input().strip().translate(_NORMALIZE)
             
-            # 分割起点和终点信息
-            if '-' not in route_info:
+            # 检查起点和终点的分隔符
+            if route_info.count('-') != 1:
                 print("错误：格式不正确，请使用'-'分隔起点和终点")
                 continue
                 
-            start_info, end_info = [x.strip() for x in route_info.split('-')]
-            
-            # 处理起点信息
-            start_info = start_info.replace('，', ',')
-            if ',' not in start_info:
+            start_info, end_info = route_info.split('-')
+            if start_info.count(',') != 1:
                 print("错误：起点格式不正确，请使用逗号分隔线路名和站名")
                 continue
-            start_line, start_station = [x.strip() for x in start_info.split(',')]
-            
-            # 处理终点信息
-            end_info = end_info.replace('，', ',')
-            if ',' not in end_info:
+            if end_info.count(',') != 1:
                 print("错误：终点格式不正确，请使用逗号分隔线路名和站名")
                 continue
-            end_line, end_station = [x.strip() for x in end_info.split(',')]
             
-            # 验证线路是否存在
-            if start_line not in subway.lines:
-                print(f"错误：未找到线路 '{start_line}'")
-                continue
-            if end_line not in subway.lines:
-                print(f"错误：未找到线路 '{end_line}'")
-                continue
+            # 一次切分出起点和终点信息
+            start_line, start_station, end_line, end_station = [x.strip() for x in _SPLIT.split(route_info)]
             
-            # 验证站点是否存在
-            if not any(s.name == start_station for s in subway.lines[start_line]):
-                print(f"错误：在 {start_line} 上未找到站点 '{start_station}'")
-                continue
-            if not any(s.name == end_station for s in subway.lines[end_line]):
-                print(f"错误：在 {end_line} 上未找到站点 '{end_station}'")
+            # 验证起点和终点是否存在:正常输入只需两次索引查找,出错时再逐项检查以给出具体的错误信息
+            if (start_line, start_station) not in subway.name_index or (end_line, end_station) not in subway.name_index:
+                if start_line not in subway.lines:
+                    print(f"错误：未找到线路 '{start_line}'")
+                elif end_line not in subway.lines:
+                    print(f"错误：未找到线路 '{end_line}'")
+                elif (start_line, start_station) not in subway.name_index:
+                    print(f"错误：在 {start_line} 上未找到站点 '{start_station}'")
+                else:
+                    print(f"错误：在 {end_line} 上未找到站点 '{end_station}'")
                 continue
             
-            routes = subway.find_route(start_line, start_station, end_line, end_station)
-            
-            if routes:
-                print("\n路线规划：")
-                for i, route in enumerate(routes):
-                    print(f"\n 路线 {i+1}：")
-                    for station, is_transfer in route:
-                        if is_transfer:
-                            print("换乘")
-                        print(f"{station.line}，{station.name}")
-            else:
+            # 边查找边输出,不必等所有路线都找到
+            route_count = 0
+            for route_count, route in enumerate(subway.find_route(start_line, start_station, end_line, end_station), 1):
+                if route_count == 1:
+                    print("\n路线规划：")
+                print(f"\n 路线 {route_count}：")
+                for station, is_transfer in route:
+                    if is_transfer:
+                        print("换乘")
+                    print(f"{station.line}，{station.name}")
+            if route_count == 0:
                 print("未找到可行路线")
                 
             # 询问是否继续
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from project import STOP_COST, TRANSFER_COST, SubwaySystem
+
+
+def load_csv(text: str) -> SubwaySystem:
+    """
+    将CSV文本写入临时文件并加载为地铁换乘系统。
+
+    :param text: 不含表头的CSV内容
+    :return: 加载完成的SubwaySystem
+    """
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.csv', delete=False) as f:
+        f.write('站点ID,线路名,站名,可换乘站点ID\n')
+        f.write(text)
+    try:
+        subway = SubwaySystem()
+        subway.load_from_csv(f.name)
+    finally:
+        os.remove(f.name)
+    return subway
+
+
+def route_key(route):
+    """
+    计算路线的(代价, 换乘次数)。
+    """
+    transfers = sum(is_transfer for _, is_transfer in route)
+    stops = len(route) - 1 - transfers
+    return stops * STOP_COST + transfers * TRANSFER_COST, transfers
+
+
+class FindRouteTest(unittest.TestCase):
+
+    def test_equal_cost_routes_prefer_fewer_transfers(self):
+        # A线 a0..a4, a4换乘c0; a0换乘b0; B线 b0,b1, b1换乘c2; C线 c0,c1,c2
+        subway = load_csv(
+            '1,A,a0,6\n'
+            '2,A,a1,\n'
+            '3,A,a2,\n'
+            '4,A,a3,\n'
+            '5,A,a4,8\n'
+            '6,B,b0,1\n'
+            '7,B,b1,10\n'
+            '8,C,c0,5\n'
+            '9,C,c1,\n'
+            '10,C,c2,7\n'
+        )
+        routes = list(subway.find_route('A', 'a0', 'C', 'c1'))
+        self.assertEqual([route_key(route) for route in routes][:2], [(8, 1), (8, 2)])
+
+    def test_non_positive_max_paths_returns_nothing(self):
+        subway = load_csv(
+            '1,A,a0,3\n'
+            '2,A,a1,\n'
+            '3,B,b0,1\n'
+            '4,B,b1,\n'
+        )
+        for max_paths in (0, -1):
+            self.assertEqual(list(subway.find_route('A', 'a0', 'A', 'a1', max_paths=max_paths)), [])
+            self.assertEqual(list(subway.find_route('A', 'a0', 'B', 'b1', max_paths=max_paths)), [])
+        self.assertEqual(len(list(subway.find_route('A', 'a0', 'B', 'b1', max_paths=1))), 1)
+
+    def test_no_back_to_back_transfers_within_one_station(self):
+        # 人民广场的1号线、2号线、8号线两两可换乘,不应先换乘2号线再换乘8号线
+        subway = SubwaySystem()
+        subway.load_from_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '线路.csv'))
+        routes = list(subway.find_route('1号线', '人民广场', '8号线', '虹口足球场'))
+        self.assertEqual([[(station.line, station.name, is_transfer) for station, is_transfer in route]
+                          for route in routes],
+                         [[('1号线', '人民广场', False), ('8号线', '人民广场', True), ('8号线', '虹口足球场', False)]])
+        for route in subway.find_route('11号线', '迪士尼', '8号线', '东方体育中心'):
+            for k in range(2, len(route)):
+                self.assertFalse(route[k][1] and route[k - 1][1]
+                                 and route[k][0].id in route[k - 2][0].transfer_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()